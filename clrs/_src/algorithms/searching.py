@@ -26,7 +26,7 @@ See "Introduction to Algorithms" 3ed (CLRS3) for more information.
 # pylint: disable=invalid-name
 
 
-from typing import Tuple, Union
+from typing import Optional, Tuple, Union
 
 import chex
 from clrs._src import probing
@@ -38,6 +38,37 @@ _Array = np.ndarray
 _Numeric = Union[int, float]
 _Out = Tuple[int, probing.ProbesDict]
 
+# Number of keys compared at a time when scanning for the first match.
+_SCAN_BLOCK_SIZE = 4096
+
+
+def _mask_one_rows(idx: _Array, n: int) -> _Array:
+  """Stacks `probing.mask_one(k, n)` for every `k` in `idx` into one array.
+
+  Hint masks are stored as `uint8`; they are cast to float when batched.
+  """
+  probe = np.zeros((idx.shape[0], n), dtype=np.uint8)
+  probe[np.arange(idx.shape[0]), idx] = 1
+  return probe
+
+
+def _array_rows(pos_trace: _Array) -> _Array:
+  """Stacks `probing.array(pos)` for every permutation `pos` in `pos_trace`."""
+  steps, n = pos_trace.shape
+  probe = np.tile(np.arange(n), (steps, 1))
+  probe[np.arange(steps)[:, None], pos_trace[:, 1:]] = pos_trace[:, :-1]
+  return probe
+
+
+def _first_eq(A: _Array, x: _Numeric) -> int:
+  """Index of the first `x` in `A`, or -1; scans in blocks to exit early."""
+  for start in range(0, A.shape[0], _SCAN_BLOCK_SIZE):
+    eq = A[start:start + _SCAN_BLOCK_SIZE] == x
+    k = int(np.argmax(eq))
+    if eq[k]:
+      return start + k
+  return -1
+
 
 def minimum(A: _Array) -> _Out:
   """Minimum."""
@@ -46,37 +77,37 @@ def minimum(A: _Array) -> _Out:
   probes = probing.initialize(specs.SPECS['minimum'])
 
   A_pos = np.arange(A.shape[0])
+  # `A_pos` is never permuted, so the pointer hint is the same at every step.
+  pred_h = probing.array(A_pos)
 
   probing.push(
       probes,
       specs.Stage.INPUT,
       next_probe={
-          'pos': np.copy(A_pos) * 1.0 / A.shape[0],
+          'pos': A_pos / A.shape[0],
           'key': np.copy(A)
       })
 
-  probing.push(
+  # Index of the running minimum after each step. A new minimum is only taken
+  # on a strict decrease, so ties keep the earliest index. As with the
+  # `A[min_] > A[i]` test, NaN keys are never taken, and a leading NaN is kept.
+  running_min = np.fmin.accumulate(A)
+  is_new_min = np.concatenate(([True], A[1:] < running_min[:-1]))
+  if np.isnan(A[0]):
+    is_new_min[1:] = False
+  min_trace = np.maximum.accumulate(
+      np.where(is_new_min, np.arange(A.shape[0]), 0))
+
+  probing.push_batch(
       probes,
       specs.Stage.HINT,
-      next_probe={
-          'pred_h': probing.array(np.copy(A_pos)),
-          'min_h': probing.mask_one(0, A.shape[0]),
-          'i': probing.mask_one(0, A.shape[0])
+      next_probes={
+          'pred_h': np.broadcast_to(pred_h, (A.shape[0],) + pred_h.shape),
+          'min_h': _mask_one_rows(min_trace, A.shape[0]),
+          'i': np.eye(A.shape[0], dtype=np.uint8)
       })
 
-  min_ = 0
-  for i in range(1, A.shape[0]):
-    if A[min_] > A[i]:
-      min_ = i
-
-    probing.push(
-        probes,
-        specs.Stage.HINT,
-        next_probe={
-            'pred_h': probing.array(np.copy(A_pos)),
-            'min_h': probing.mask_one(min_, A.shape[0]),
-            'i': probing.mask_one(i, A.shape[0])
-        })
+  min_ = int(min_trace[-1])
 
   probing.push(
       probes,
@@ -105,7 +136,9 @@ def parallel_find(x: _Numeric, A: _Array) -> _Out:
           'target': x,
       })
   
-  i = np.where(A == x)[0][0]
+  i = _first_eq(A, x)
+  if i < 0:
+    raise ValueError(f'{x} not found in array.')
   
   probing.push(
       probes,
@@ -130,17 +163,18 @@ def parallel_search(x: _Numeric, A: _Array) -> _Out:
       probes,
       specs.Stage.INPUT,
       next_probe={
-          'pos': np.copy(T_pos) * 1.0 / A.shape[0],
+          'pos': T_pos / A.shape[0],
           'key': np.copy(nodes), #
           'target': x,
           # 'adj': np.copy(adj)
       })
   
-  B = np.zeros_like(nodes)
-  i = 0
-  while i < len(A) and x >= A[i]: 
-     B[i] = 1
-     i = i + 1
+  # `i` is the length of the prefix of `A` whose keys are all <= x. Negating
+  # `A <= x` rather than testing `A > x` stops at NaN, as the loop did.
+  gt = np.flatnonzero(~(A <= x))
+  i = int(gt[0]) if gt.size else n
+  B = np.zeros(n + 1, dtype=np.uint8)
+  B[:i] = 1
           
   probing.push(
       probes,
@@ -158,6 +192,26 @@ def parallel_search(x: _Numeric, A: _Array) -> _Out:
   
   return i, probes
 
+def _binary_search_trace(x: _Numeric, A: _Array) -> Tuple[_Array, _Array]:
+  """Returns the `low` and `high` bounds of binary search before every step."""
+  # The loop runs at most ceil(log2(n)) times, so the trace is preallocated.
+  max_steps = int(np.ceil(np.log2(max(A.shape[0], 1)))) + 1
+  trace = np.empty((2, max_steps), dtype=int)
+  low = 0
+  high = A.shape[0] - 1  # make sure return is always in array
+  trace[:, 0] = low, high
+  steps = 1
+  while low < high:
+    mid = (low + high) // 2
+    if x <= A[mid]:
+      high = mid
+    else:
+      low = mid + 1
+    trace[:, steps] = low, high
+    steps += 1
+  return trace[0, :steps], trace[1, :steps]
+
+
 def binary_search(x: _Numeric, A: _Array) -> _Out:
   """Binary search."""
 
@@ -165,45 +219,31 @@ def binary_search(x: _Numeric, A: _Array) -> _Out:
   probes = probing.initialize(specs.SPECS['binary_search'])
 
   T_pos = np.arange(A.shape[0])
+  pred_h = probing.array(T_pos)
 
   probing.push(
       probes,
       specs.Stage.INPUT,
       next_probe={
-          'pos': np.copy(T_pos) * 1.0 / A.shape[0],
+          'pos': T_pos / A.shape[0],
           'key': np.copy(A),
           'target': x
       })
 
-  probing.push(
+  low_trace, high_trace = _binary_search_trace(x, A)
+  high = int(high_trace[-1])
+
+  probing.push_batch(
       probes,
       specs.Stage.HINT,
-      next_probe={
-          'pred_h': probing.array(np.copy(T_pos)),
-          'low': probing.mask_one(0, A.shape[0]),
-          'high': probing.mask_one(A.shape[0] - 1, A.shape[0]),
-          'mid': probing.mask_one((A.shape[0] - 1) // 2, A.shape[0]),
+      next_probes={
+          'pred_h': np.broadcast_to(pred_h,
+                                    (low_trace.shape[0],) + pred_h.shape),
+          'low': _mask_one_rows(low_trace, A.shape[0]),
+          'high': _mask_one_rows(high_trace, A.shape[0]),
+          'mid': _mask_one_rows((low_trace + high_trace) // 2, A.shape[0]),
       })
 
-  low = 0
-  high = A.shape[0] - 1  # make sure return is always in array
-  while low < high:
-    mid = (low + high) // 2
-    if x <= A[mid]:
-      high = mid
-    else:
-      low = mid + 1
-
-    probing.push(
-        probes,
-        specs.Stage.HINT,
-        next_probe={
-            'pred_h': probing.array(np.copy(T_pos)),
-            'low': probing.mask_one(low, A.shape[0]),
-            'high': probing.mask_one(high, A.shape[0]),
-            'mid': probing.mask_one((low + high) // 2, A.shape[0]),
-        })
-
   probing.push(
       probes,
       specs.Stage.OUTPUT,
@@ -214,6 +254,49 @@ def binary_search(x: _Numeric, A: _Array) -> _Out:
   return high, probes
 
 
+def _swap(A: _Array, A_pos: _Array, i: int, j: int):
+  """Swaps entries `i` and `j` of `A` and `A_pos` in place."""
+  A[i], A[j] = A[j], A[i]
+  A_pos[i], A_pos[j] = A_pos[j], A_pos[i]
+
+
+def _median_of_three(A: _Array, A_pos: _Array, p: int, r: int):
+  """Moves the median of `A[p]`, `A[(p + r) // 2]` and `A[r]` to `A[r]`."""
+  m = (p + r) // 2
+  # Three compare-exchanges sort the triple in place.
+  for a, b in ((p, m), (m, r), (p, m)):
+    if A[b] < A[a]:
+      _swap(A, A_pos, a, b)
+  _swap(A, A_pos, m, r)
+
+
+def _partition(A: _Array, A_pos: _Array, p: int,
+               r: int) -> Tuple[int, _Array, _Array]:
+  """Partitions `A[p:r + 1]` around `A[r]` in place (CLRS3 PARTITION).
+
+  Returns the final index of the pivot, together with the value of `i + 1` and
+  a snapshot of `A_pos` after every step `j` of the loop and after the pivot is
+  swapped into place.
+  """
+  # Keys at or after `j` are untouched when step `j` runs, so all comparisons
+  # can be made up front; `i + 1` after each step is then a running count.
+  # The swaps themselves stay sequential to reproduce the exact permutation
+  # (and hints) of the Lomuto scheme, which is not a stable split.
+  leq = A[p:r] <= A[r]
+  i_trace = p + np.cumsum(np.append(leq, False))
+  pos_trace = np.empty((r - p + 1, A_pos.shape[0]), dtype=A_pos.dtype)
+  for j in range(p, r):
+    if leq[j - p]:
+      _swap(A, A_pos, i_trace[j - p] - 1, j)
+    pos_trace[j - p] = A_pos
+
+  q = int(i_trace[-1])
+  _swap(A, A_pos, q, r)
+  pos_trace[-1] = A_pos
+
+  return q, i_trace, pos_trace
+
+
 def quickselect(
     A: _Array,
     A_pos=None,
@@ -221,87 +304,91 @@ def quickselect(
     r=None,
     i=None,
     probes=None,
-) -> _Out:
-  """Quickselect (Hoare, 1961)."""
-
-  chex.assert_rank(A, 1)
+    *,
+    median_of_three: bool = False,
+    record_probes: bool = True,
+) -> Tuple[_Numeric, Optional[probing.ProbesDict]]:
+  """Quickselect (Hoare, 1961).
 
-  def partition(A, A_pos, p, r, target, probes):
-    x = A[r]
-    i = p - 1
-    for j in range(p, r):
-      if A[j] <= x:
-        i += 1
-        tmp = A[i]
-        A[i] = A[j]
-        A[j] = tmp
-        tmp = A_pos[i]
-        A_pos[i] = A_pos[j]
-        A_pos[j] = tmp
+  By default the last element of every subarray is the pivot, as in CLRS3. With
+  `median_of_three`, the median of its first, middle and last elements is
+  swapped into place first, which avoids quadratic behaviour on sorted inputs.
+  The exchange is recorded as one extra hint step ahead of each partition.
 
-      probing.push(
-          probes,
-          specs.Stage.HINT,
-          next_probe={
-              'pred_h': probing.array(np.copy(A_pos)),
-              'p': probing.mask_one(A_pos[p], A.shape[0]),
-              'r': probing.mask_one(A_pos[r], A.shape[0]),
-              'i': probing.mask_one(A_pos[i + 1], A.shape[0]),
-              'j': probing.mask_one(A_pos[j], A.shape[0]),
-              'i_rank': (i + 1) * 1.0 / A.shape[0],
-              'target': target * 1.0 / A.shape[0]
-          })
+  Without `record_probes`, the selection is delegated to `np.partition`, `A` is
+  left untouched and `None` is returned in place of the probes.
+  """
 
-    tmp = A[i + 1]
-    A[i + 1] = A[r]
-    A[r] = tmp
-    tmp = A_pos[i + 1]
-    A_pos[i + 1] = A_pos[r]
-    A_pos[r] = tmp
+  chex.assert_rank(A, 1)
 
-    probing.push(
+  def partition(A, A_pos, p, r, target, probes):
+    if median_of_three:
+      _median_of_three(A, A_pos, p, r)
+      pivot_pos = np.copy(A_pos)
+    q, i_trace, pos_trace = _partition(A, A_pos, p, r)
+
+    # The last step swaps the pivot into place, at `j = r`.
+    j_trace = np.arange(p, r + 1)
+    i_rank = i_trace / A.shape[0]
+    i_rank[-1] = (q - p) / A.shape[0]
+
+    if median_of_three:
+      # The pivot exchange is one extra step, taken before the loop starts.
+      pos_trace = np.concatenate((pivot_pos[None], pos_trace))
+      i_trace = np.append(p, i_trace)
+      j_trace = np.append(p, j_trace)
+      i_rank = np.append(p / A.shape[0], i_rank)
+
+    steps = np.arange(pos_trace.shape[0])
+    probing.push_batch(
         probes,
         specs.Stage.HINT,
-        next_probe={
-            'pred_h': probing.array(np.copy(A_pos)),
-            'p': probing.mask_one(A_pos[p], A.shape[0]),
-            'r': probing.mask_one(A_pos[r], A.shape[0]),
-            'i': probing.mask_one(A_pos[i + 1], A.shape[0]),
-            'j': probing.mask_one(A_pos[r], A.shape[0]),
-            'i_rank': (i + 1 - p) * 1.0 / A.shape[0],
-            'target': target * 1.0 / A.shape[0]
+        next_probes={
+            'pred_h': _array_rows(pos_trace),
+            'p': _mask_one_rows(pos_trace[:, p], A.shape[0]),
+            'r': _mask_one_rows(pos_trace[:, r], A.shape[0]),
+            'i': _mask_one_rows(pos_trace[steps, i_trace], A.shape[0]),
+            'j': _mask_one_rows(pos_trace[steps, j_trace], A.shape[0]),
+            'i_rank': i_rank,
+            'target': np.full(steps.shape[0], target / A.shape[0])
         })
 
-    return i + 1
+    return q
 
-  if A_pos is None:
-    A_pos = np.arange(A.shape[0])
   if p is None:
     p = 0
   if r is None:
     r = len(A) - 1
   if i is None:
     i = len(A) // 2
+  if not record_probes:
+    return np.partition(A[p:r + 1], i)[i], None
+  if A_pos is None:
+    A_pos = np.arange(A.shape[0])
   if probes is None:
     probes = probing.initialize(specs.SPECS['quickselect'])
     probing.push(
         probes,
         specs.Stage.INPUT,
         next_probe={
-            'pos': np.copy(A_pos) * 1.0 / A.shape[0],
+            'pos': A_pos / A.shape[0],
             'key': np.copy(A)
         })
 
-  q = partition(A, A_pos, p, r, i, probes)
-  k = q - p
-  if i == k:
-    probing.push(
-        probes,
-        specs.Stage.OUTPUT,
-        next_probe={'median': probing.mask_one(A_pos[q], A.shape[0])})
-    probing.finalize(probes)
-    return A[q], probes
-  elif i < k:
-    return quickselect(A, A_pos, p, q - 1, i, probes)
-  else:
-    return quickselect(A, A_pos, q + 1, r, i - k - 1, probes)
+  # The recursion of CLRS3 RANDOMIZED-SELECT is a tail call, so it is unrolled
+  # into a loop over the bounds of the current subarray.
+  while True:
+    q = partition(A, A_pos, p, r, i, probes)
+    k = q - p
+    if i == k:
+      probing.push(
+          probes,
+          specs.Stage.OUTPUT,
+          next_probe={'median': probing.mask_one(A_pos[q], A.shape[0])})
+      probing.finalize(probes)
+      return A[q], probes
+    elif i < k:
+      r = q - 1
+    else:
+      p = q + 1
+      i = i - k - 1
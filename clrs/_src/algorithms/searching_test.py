@@ -18,6 +18,7 @@
 
 from absl.testing import absltest
 
+from clrs._src import specs
 from clrs._src.algorithms import searching
 import numpy as np
 
@@ -33,6 +34,24 @@ class SearchingTest(absltest.TestCase):
       idx, _ = searching.minimum(A)
       self.assertEqual(A.min(), A[idx])
 
+  def test_minimum_ties(self):
+    A = np.array([5, 3, 7, 3, 1, 1, 4])
+    idx, _ = searching.minimum(A)
+    self.assertEqual(idx, 4)
+
+  def test_minimum_nan(self):
+    idx, _ = searching.minimum(np.array([3., np.nan, 1.]))
+    self.assertEqual(idx, 2)
+    idx, _ = searching.minimum(np.array([np.nan, 3., 1.]))
+    self.assertEqual(idx, 0)
+
+  def test_minimum_mask_dtype(self):
+    _, probes = searching.minimum(np.random.randint(0, 100, size=(13,)))
+    for name in ['min_h', 'i']:
+      self.assertEqual(
+          probes[specs.Stage.HINT][specs.Location.NODE][name]['data'].dtype,
+          np.uint8)
+
   def test_binary_search(self):
     A = np.random.randint(0, 100, size=(13,))
     A.sort()
@@ -40,11 +59,68 @@ class SearchingTest(absltest.TestCase):
     idx, _ = searching.binary_search(x, A)
     self.assertEqual(A[idx], x)
 
+  def test_parallel_find(self):
+    A = np.random.randint(0, 100, size=(13,))
+    x = np.random.choice(A)
+    idx, _ = searching.parallel_find(x, A)
+    self.assertEqual(idx, list(A).index(x))
+
+  def test_first_eq(self):
+    A = np.zeros(3 * searching._SCAN_BLOCK_SIZE, dtype=np.int32)
+    for idx in [0, searching._SCAN_BLOCK_SIZE + 7, A.shape[0] - 1]:
+      B = np.copy(A)
+      B[idx] = 1
+      B[-1] = 1
+      self.assertEqual(searching._first_eq(B, 1), idx)
+    self.assertEqual(searching._first_eq(A, 1), -1)
+
+  def test_parallel_search(self):
+    A = np.random.randint(0, 100, size=(13,))
+    A.sort()
+    x = np.random.randint(-10, 110)
+    idx, _ = searching.parallel_search(x, A)
+    self.assertEqual(idx, np.sum(A <= x))
+
+  def test_parallel_search_nan(self):
+    idx, _ = searching.parallel_search(np.nan, np.array([1., 2., 3.]))
+    self.assertEqual(idx, 0)
+    idx, _ = searching.parallel_search(5., np.array([1., np.nan, 3.]))
+    self.assertEqual(idx, 1)
+
   def test_quickselect(self):
     A = np.random.randint(0, 100, size=(13,))
     idx, _ = searching.quickselect(A)
     self.assertEqual(sorted(A)[len(A) // 2], idx)
 
+  def test_quickselect_mask_dtype(self):
+    _, probes = searching.quickselect(np.random.randint(0, 100, size=(13,)))
+    for name in ['p', 'r', 'i', 'j']:
+      self.assertEqual(
+          probes[specs.Stage.HINT][specs.Location.NODE][name]['data'].dtype,
+          np.uint8)
+
+  def test_quickselect_without_probes(self):
+    A = np.random.randint(0, 100, size=(13,))
+    idx, probes = searching.quickselect(np.copy(A), record_probes=False)
+    self.assertEqual(sorted(A)[len(A) // 2], idx)
+    self.assertIsNone(probes)
+    # A positional flag must not silently switch to the probe-free path.
+    with self.assertRaises(TypeError):
+      searching.quickselect(np.copy(A), None, None, None, None, None, False)
+
+  def test_quickselect_median_of_three(self):
+    for A in [np.random.randint(0, 100, size=(13,)), np.arange(13)]:
+      idx, _ = searching.quickselect(np.copy(A), median_of_three=True)
+      self.assertEqual(sorted(A)[len(A) // 2], idx)
+
+  def test_quickselect_median_of_three_hints(self):
+    A = np.arange(13)
+    _, probes = searching.quickselect(np.copy(A), median_of_three=True)
+    j = probes[specs.Stage.HINT][specs.Location.NODE]['j']['data']
+    # The pivot exchange gets its own step, so `j` stays at `p` for two steps.
+    np.testing.assert_array_equal(j[0], j[1])
+    np.testing.assert_array_equal(j[2], np.eye(13)[1])
+
 
 if __name__ == '__main__':
   absltest.main()
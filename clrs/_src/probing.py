@@ -100,6 +100,23 @@ class ProbeError(Exception):
   pass
 
 
+@attr.define
+class _HintBatch:
+  """Hints for several timesteps, stacked along the leading axis."""
+
+  data: _Array
+
+
+def _stack_hints(data: List[Union[_Data, _HintBatch]]) -> _Array:
+  """Stacks single-step hints and `_HintBatch`es along the time axis."""
+  if not any(isinstance(d, _HintBatch) for d in data):
+    return np.stack(data)
+  return np.concatenate([
+      d.data if isinstance(d, _HintBatch) else np.expand_dims(d, 0)
+      for d in data
+  ])
+
+
 def initialize(spec: specs.Spec) -> ProbesDict:
   """Initializes an empty `ProbesDict` corresponding with the provided spec."""
   probes = dict()
@@ -131,6 +148,36 @@ def push(probes: ProbesDict, stage: str, next_probe):
       probes[stage][loc][name]['data'].append(next_probe[name])  # pytype: disable=attribute-error
 
 
+def push_batch(probes: ProbesDict, stage: str, next_probes):
+  """Pushes probes for several timesteps, stacked along the leading axis.
+
+  Each batch is kept as a single entry and only joined with the other hints in
+  `finalize`, so the cost of a push does not grow with the number of steps.
+  """
+  if stage != _Stage.HINT:
+    raise ProbeError(f'Only hints can be pushed in batches, got {stage}.')
+  # Validate every probe before appending any, so that a bad batch leaves
+  # `probes` untouched.
+  num_steps = None
+  for loc in [_Location.NODE, _Location.EDGE, _Location.GRAPH]:
+    for name in probes[stage][loc]:
+      if name not in next_probes:
+        raise ProbeError(f'Missing probe for {name}.')
+      if isinstance(probes[stage][loc][name]['data'], _Array):
+        raise ProbeError('Attemping to push to finalized `ProbesDict`.')
+      if num_steps is None:
+        num_steps = len(next_probes[name])
+      elif len(next_probes[name]) != num_steps:
+        raise ProbeError(f'Probe {name} has {len(next_probes[name])} steps, '
+                         f'expected {num_steps}.')
+  for loc in [_Location.NODE, _Location.EDGE, _Location.GRAPH]:
+    for name in probes[stage][loc]:
+      # Pytype thinks initialize() returns a ProbesDict with a str for all final
+      # values instead of _DataOrType.
+      probes[stage][loc][name]['data'].append(  # pytype: disable=attribute-error
+          _HintBatch(np.asarray(next_probes[name])))
+
+
 def finalize(probes: ProbesDict):
   """Finalizes a `ProbesDict` by stacking/squeezing `data` field."""
   for stage in [_Stage.INPUT, _Stage.OUTPUT, _Stage.HINT]:
@@ -140,7 +187,7 @@ def finalize(probes: ProbesDict):
           raise ProbeError('Attemping to re-finalize a finalized `ProbesDict`.')
         if stage == _Stage.HINT:
           # Hints are provided for each timestep. Stack them here.
-          probes[stage][loc][name]['data'] = np.stack(
+          probes[stage][loc][name]['data'] = _stack_hints(
               probes[stage][loc][name]['data'])
         else:
           # Only one instance of input/output exist. Remove leading axis.
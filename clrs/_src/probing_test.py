@@ -18,6 +18,7 @@
 from absl.testing import absltest
 
 from clrs._src import probing
+from clrs._src import specs
 import jax.numpy as jnp
 import numpy as np
 
@@ -27,6 +28,57 @@ import numpy as np
 
 class ProbingTest(absltest.TestCase):
 
+  def test_push_batch(self):
+    spec = {
+        'pos': (specs.Stage.INPUT, specs.Location.NODE, specs.Type.SCALAR),
+        'pred_h': (specs.Stage.HINT, specs.Location.NODE, specs.Type.POINTER),
+        'i_rank': (specs.Stage.HINT, specs.Location.GRAPH, specs.Type.SCALAR),
+    }
+    pred_h = np.array([[0, 0, 1], [1, 2, 2]])
+    i_rank = np.array([0.5, 1.0])
+
+    expected = probing.initialize(spec)
+    for step in range(2):
+      probing.push(expected, specs.Stage.HINT,
+                   next_probe={'pred_h': pred_h[step],
+                               'i_rank': i_rank[step]})
+    probing.finalize(expected)
+
+    probes = probing.initialize(spec)
+    probing.push_batch(probes, specs.Stage.HINT,
+                       next_probes={'pred_h': pred_h, 'i_rank': i_rank})
+    probing.finalize(probes)
+
+    for loc in [specs.Location.NODE, specs.Location.GRAPH]:
+      for name in expected[specs.Stage.HINT][loc]:
+        np.testing.assert_array_equal(
+            expected[specs.Stage.HINT][loc][name]['data'],
+            probes[specs.Stage.HINT][loc][name]['data'])
+
+    # Batches can be mixed with single-step pushes.
+    probes = probing.initialize(spec)
+    probing.push_batch(probes, specs.Stage.HINT,
+                       next_probes={'pred_h': pred_h[:1], 'i_rank': i_rank[:1]})
+    probing.push(probes, specs.Stage.HINT,
+                 next_probe={'pred_h': pred_h[1], 'i_rank': i_rank[1]})
+    probing.finalize(probes)
+
+    for loc in [specs.Location.NODE, specs.Location.GRAPH]:
+      for name in expected[specs.Stage.HINT][loc]:
+        np.testing.assert_array_equal(
+            expected[specs.Stage.HINT][loc][name]['data'],
+            probes[specs.Stage.HINT][loc][name]['data'])
+
+    probes = probing.initialize(spec)
+    with self.assertRaises(probing.ProbeError):
+      probing.push_batch(probes, specs.Stage.HINT,
+                         next_probes={'pred_h': pred_h, 'i_rank': i_rank[:1]})
+    # A rejected batch must not leave some hints one step ahead of others.
+    self.assertEqual(probes, probing.initialize(spec))
+    with self.assertRaises(probing.ProbeError):
+      probing.push_batch(probes, specs.Stage.INPUT,
+                         next_probes={'pos': np.zeros((1, 3))})
+
   def test_array(self):
     A_pos = np.array([1, 2, 0, 4, 3])
     expected = np.array([2, 1, 1, 4, 0])